@@ -9,6 +9,7 @@ import json
 import sys
 import subprocess
 from flask_cors import CORS
+import profiler
 
 # Handle TensorFlow import for Python 3.10
 try:
@@ -214,7 +215,7 @@ def ai_trading_loop():
             time.sleep(60)
 
 # Start AI Trading in Background
-ai_thread = threading.Thread(target=ai_trading_loop, daemon=True)
+ai_thread = threading.Thread(target=ai_trading_loop, name="ai-trading-loop", daemon=True)
 ai_thread.start()
 
 # API Route to Toggle AI ON/OFF
@@ -350,6 +351,9 @@ def process_trade():
             'message': str(e)
         }), 500
 
+# Admin-only /admin/profile endpoint (see profiler.py)
+profiler.register(app)
+
 # Add a healthcheck endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
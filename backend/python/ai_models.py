@@ -13,6 +13,7 @@ import flask_cors
 import subprocess
 import json
 import sys
+import profiler
 
 
 np.NaN = np.nan
@@ -174,7 +175,7 @@ def ai_trading_loop():
             time.sleep(60)
 
 # Start AI Trading in Background
-threading.Thread(target=ai_trading_loop, daemon=True).start()
+threading.Thread(target=ai_trading_loop, name="ai-trading-loop", daemon=True).start()
 
 # API Route to Toggle AI ON/OFF
 @app.route("/toggle_ai", methods=["POST"])
@@ -295,5 +296,8 @@ def process_trade():
             'message': str(e)
         }), 500
 
+# Admin-only /admin/profile endpoint (see profiler.py)
+profiler.register(app)
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
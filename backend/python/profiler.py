@@ -0,0 +1,226 @@
+import hmac
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Sampling limits so a profile request can't hurt the live trading loop
+DEFAULT_INTERVAL = 0.01   # 10ms between samples
+MIN_INTERVAL = 0.005
+MAX_DURATION = 60         # seconds
+
+# A thread counts as on-CPU for a sample if it used at least this share of the
+# wall time since the previous sample (per-thread CPU clocks, where available)
+ON_CPU_SHARE = 0.1
+
+# Leaf pseudo-frame for samples taken while a thread was blocked (sleep, socket, subprocess...)
+WAITING_FRAME = "[waiting]"
+
+FORMATS = {None, "json", "collapsed"}
+
+# Only one profile may run at a time
+_profile_lock = threading.Lock()
+
+# "Thread-12 (process_request_thread)" -> "flask-request", "Thread-3 (worker)" -> "worker"
+_GENERIC_THREAD_NAME = re.compile(r"^Thread-\d+(?: \((?P<target>.+)\))?$")
+_THREAD_ROLES = {"process_request_thread": "flask-request"}
+
+def thread_role(name):
+    match = _GENERIC_THREAD_NAME.match(name)
+    if not match:
+        return name
+    target = match.group("target")
+    if target is None:
+        return "Thread"
+    return _THREAD_ROLES.get(target, target)
+
+# Per-thread CPU time in ns (Linux only), or None if unavailable.
+# Uses the kernel's per-TID CPU clock id, so a thread that has already exited just
+# raises OSError instead of touching a stale pthread handle.
+def _thread_cpu_ns(native_id):
+    if native_id is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        return time.clock_gettime_ns((~native_id << 3) | 6)  # MAKE_THREAD_CPUCLOCK(tid, CPUCLOCK_SCHED)
+    except OSError:
+        return None
+
+# Key for one thread's current stack: (thread role, (outer code, ..., inner code), on_cpu).
+# Only code objects are collected here; formatting happens once, after sampling.
+def _stack_key(role, frame, on_cpu):
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return role, tuple(codes), on_cpu
+
+def _format_code(code):
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+# Sample the stacks of all threads (except the sampler) every `interval` seconds.
+# on_cpu is True/False from the thread's CPU clock, or None when that isn't available.
+def sample_stacks(duration, interval=DEFAULT_INTERVAL):
+    own_ident = threading.get_ident()
+    stacks = Counter()
+    roles = {}
+    last_cpu = {}
+    ticks = 0
+    last_wall = time.monotonic_ns()
+    deadline = time.monotonic() + duration
+
+    for t in threading.enumerate():
+        last_cpu[t.ident] = _thread_cpu_ns(t.native_id)
+
+    while True:
+        threads = {t.ident: t for t in threading.enumerate()}
+        frames = sys._current_frames()
+        wall = time.monotonic_ns()
+        for ident, frame in frames.items():
+            if ident == own_ident:
+                continue
+            thread = threads.get(ident)
+            name = thread.name if thread else f"thread-{ident}"
+            if name not in roles:
+                roles[name] = thread_role(name)
+
+            cpu = _thread_cpu_ns(thread.native_id if thread else None)
+            prev = last_cpu.get(ident)
+            last_cpu[ident] = cpu
+            on_cpu = None
+            if cpu is not None and prev is not None:
+                on_cpu = cpu - prev >= ON_CPU_SHARE * (wall - last_wall)
+
+            stacks[_stack_key(roles[name], frame, on_cpu)] += 1
+        del frames, frame  # don't keep other threads' frames alive
+        last_wall = wall
+        ticks += 1
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+
+    return stacks, ticks
+
+# Flamegraph-compatible collapsed stack format: "role;outer;...;inner <count>" per line.
+# Samples taken while the thread was blocked end in a WAITING_FRAME leaf.
+def to_collapsed(stacks):
+    merged = Counter()
+    for (role, codes, on_cpu), count in stacks.items():
+        frames = [role] + [_format_code(c) for c in codes]
+        if on_cpu is False:
+            frames.append(WAITING_FRAME)
+        merged[";".join(frames)] += count
+    return "".join(f"{frames} {count}\n" for frames, count in merged.most_common())
+
+# Per-function wall-clock summary across all threads.
+# total/self samples count every sample, blocked or not; cpu_samples counts only
+# samples where the thread was on-CPU. Rows are sorted by CPU samples, then wall samples,
+# so a loop sleeping in time.sleep() doesn't hide the functions actually burning CPU.
+def summarize(stacks, period=DEFAULT_INTERVAL, limit=50):
+    self_counts = Counter()
+    total_counts = Counter()
+    cpu_counts = Counter()
+    all_samples = 0
+    cpu_samples = 0
+    for (role, codes, on_cpu), count in stacks.items():
+        all_samples += count
+        if not codes:
+            continue
+        self_counts[codes[-1]] += count
+        for code in set(codes):
+            total_counts[code] += count
+            if on_cpu:
+                cpu_counts[code] += count
+        if on_cpu:
+            cpu_samples += count
+
+    ranked = sorted(total_counts, key=lambda c: (cpu_counts[c], total_counts[c]), reverse=True)
+    summary = []
+    for code in ranked[:limit]:
+        total = total_counts[code]
+        summary.append({
+            "function": _format_code(code),
+            "self_samples": self_counts[code],
+            "total_samples": total,
+            "cpu_samples": cpu_counts[code],
+            "self_seconds": round(self_counts[code] * period, 3),
+            "total_seconds": round(total * period, 3),
+            "total_percent": round(100.0 * total / all_samples, 2),
+            "cpu_percent": round(100.0 * cpu_counts[code] / cpu_samples, 2) if cpu_samples else 0.0,
+        })
+    return summary
+
+# Run a profile; returns None if another profile is already running
+def run_profile(duration, interval=DEFAULT_INTERVAL):
+    duration = min(max(float(duration), 0.0), MAX_DURATION)
+    interval = min(max(float(interval), MIN_INTERVAL), max(duration, MIN_INTERVAL))
+
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        print(f"[INFO] Profiling all threads for {duration}s (interval {interval}s)...")
+        started = time.monotonic()
+        stacks, ticks = sample_stacks(duration, interval)
+        elapsed = time.monotonic() - started
+    finally:
+        _profile_lock.release()
+
+    return {
+        "duration": duration,
+        "elapsed": round(elapsed, 3),
+        "interval": interval,
+        "samples": ticks,
+        "cpu_time_available": any(on_cpu is not None for _, _, on_cpu in stacks),
+        "collapsed": to_collapsed(stacks),
+        # Use the measured sample period so seconds account for sampling overhead
+        "summary": summarize(stacks, elapsed / ticks),
+    }
+
+# Admin-only sampling profiler across all threads (including the AI trading loop)
+def register(app):
+    from flask import Response, request, jsonify
+
+    @app.route("/admin/profile", methods=["POST"])
+    def profile_endpoint():
+        admin_token = os.environ.get("PROFILER_ADMIN_TOKEN")
+        given_token = request.headers.get("X-Admin-Token", "")
+        if not admin_token or not hmac.compare_digest(given_token.encode("utf-8"), admin_token.encode("utf-8")):
+            return jsonify({"error": "Unauthorized"}), 403
+
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+
+        output_format = data.get("format")
+        if output_format not in FORMATS:
+            return jsonify({"error": "format must be 'json' or 'collapsed'"}), 400
+
+        try:
+            duration = float(data.get("duration", 10))
+            interval = float(data.get("interval", DEFAULT_INTERVAL))
+        except (TypeError, ValueError):
+            return jsonify({"error": "duration and interval must be numbers"}), 400
+        if not (math.isfinite(duration) and 0 < duration <= MAX_DURATION):
+            return jsonify({"error": f"duration must be a number between 0 and {MAX_DURATION}"}), 400
+        if not (math.isfinite(interval) and interval > 0):
+            return jsonify({"error": "interval must be a positive number"}), 400
+
+        result = run_profile(duration, interval)
+        if result is None:
+            return jsonify({"error": "A profile is already running"}), 409
+
+        # Raw collapsed stacks for flamegraph.pl / speedscope
+        if output_format == "collapsed":
+            return Response(result["collapsed"], mimetype="text/plain",
+                            headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
+
+        return jsonify(result)
+
+    return profile_endpoint
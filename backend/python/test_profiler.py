@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import profiler
+
+
+def outer():
+    pass
+
+def inner():
+    pass
+
+def _stacks():
+    # Two request threads share `outer`; one request is on-CPU in `inner`, the trading loop is blocked
+    return Counter({
+        ("flask-request", (outer.__code__, inner.__code__), True): 3,
+        ("flask-request", (outer.__code__,), False): 1,
+        ("ai-trading-loop", (outer.__code__,), False): 4,
+    })
+
+
+def test_thread_role():
+    assert profiler.thread_role("Thread-12 (process_request_thread)") == "flask-request"
+    assert profiler.thread_role("Thread-3 (worker)") == "worker"
+    assert profiler.thread_role("Thread-3") == "Thread"
+    assert profiler.thread_role("ai-trading-loop") == "ai-trading-loop"
+
+
+def test_collapsed_format():
+    lines = profiler.to_collapsed(_stacks()).splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    frames = stack.split(";")
+    assert count == "4"
+    assert frames[0] == "ai-trading-loop"
+    assert frames[1].startswith("outer (")
+    assert frames[-1] == profiler.WAITING_FRAME
+
+    stack, count = lines[1].rsplit(" ", 1)
+    frames = stack.split(";")
+    assert count == "3"
+    assert frames[0] == "flask-request"
+    assert frames[2].startswith("inner (")
+
+
+def test_summary_per_function():
+    summary = profiler.summarize(_stacks(), period=0.01)
+    by_func = {e["function"].split(" ")[0]: e for e in summary}
+
+    # One row per function, however many threads ran it
+    assert len(summary) == 2
+    assert all(e["total_percent"] <= 100.0 and e["cpu_percent"] <= 100.0 for e in summary)
+    assert by_func["outer"]["total_samples"] == 8
+    assert by_func["outer"]["total_percent"] == 100.0
+    assert by_func["outer"]["self_samples"] == 5
+    assert by_func["inner"]["total_percent"] == 37.5
+    assert by_func["inner"]["cpu_percent"] == 100.0
+    # On-CPU functions rank above ones that were only waiting
+    assert summary[0]["function"].startswith("outer (")
+    assert summary[0]["cpu_samples"] == 3
+
+
+def test_run_profile_respects_duration():
+    started = time.monotonic()
+    result = profiler.run_profile(0.05, 2)
+    assert time.monotonic() - started < 0.5
+    assert result["interval"] <= 0.05
+    assert result["samples"] >= 1
+
+
+def test_run_profile_marks_sleeping_thread_as_waiting():
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait, name="sleeper", daemon=True)
+    thread.start()
+    try:
+        result = profiler.run_profile(0.1)
+    finally:
+        stop.set()
+    if not result["cpu_time_available"]:
+        pytest.skip("per-thread CPU clocks not available")
+    sleeper = [line for line in result["collapsed"].splitlines() if line.startswith("sleeper;")]
+    assert sleeper
+    assert all(line.rsplit(" ", 1)[0].endswith(profiler.WAITING_FRAME) for line in sleeper)
+
+
+def test_run_profile_while_locked():
+    with profiler._profile_lock:
+        assert profiler.run_profile(0.01) is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    flask = pytest.importorskip("flask")
+    monkeypatch.setenv("PROFILER_ADMIN_TOKEN", "secret")
+    app = flask.Flask(__name__)
+    profiler.register(app)
+    return app.test_client()
+
+
+def _post(client, body=None, token="secret", **kwargs):
+    headers = {} if token is None else {"X-Admin-Token": token}
+    if body is None:
+        body = {"duration": 0.02}
+    return client.post("/admin/profile", json=body, headers=headers, **kwargs)
+
+
+def test_endpoint_requires_token(client, monkeypatch):
+    assert _post(client, token=None).status_code == 403
+    assert _post(client, token="wrong").status_code == 403
+    assert _post(client, token="s\xe9cret").status_code == 403
+    monkeypatch.delenv("PROFILER_ADMIN_TOKEN")
+    assert _post(client).status_code == 403
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    "x",
+    5,
+    {"duration": "nan"},
+    {"duration": "inf"},
+    {"duration": -1},
+    {"duration": profiler.MAX_DURATION + 1},
+    {"duration": 0.02, "interval": "nan"},
+    {"duration": 0.02, "interval": "-inf"},
+    {"duration": 0.02, "interval": 0},
+    {"duration": 0.02, "interval": "abc"},
+    {"duration": 0.02, "format": "flamegraph"},
+])
+def test_endpoint_rejects_bad_input(client, body):
+    assert _post(client, body).status_code == 400
+
+
+def test_endpoint_conflict_when_running(client):
+    with profiler._profile_lock:
+        assert _post(client).status_code == 409
+
+
+def test_endpoint_json_and_collapsed(client):
+    response = _post(client)
+    assert response.status_code == 200
+    assert {"elapsed", "samples", "collapsed", "summary"} <= set(response.get_json())
+
+    response = _post(client, {"duration": 0.02, "format": "collapsed"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "attachment" in response.headers["Content-Disposition"]